@@ -36,14 +36,17 @@ class Component(object):
 
 
 class Application(object):
-    def __init__(self, loop=None, on_start: Optional[Callable] = None) -> None:
+    def __init__(self, loop=None, on_start: Optional[Callable] = None,
+                 concurrent_stop: bool = False) -> None:
         super(Application, self).__init__()
         self.loop = loop or asyncio.get_event_loop()
         self._components: Dict[str, Component] = {}
         self._stop_deps: dict = {}
         self._stopped: list = []
+        self._stopping: Dict[str, asyncio.Future] = {}
         self.tracer: Tracer = Tracer(self, self.loop)
         self.on_start: Optional[Callable] = on_start
+        self.concurrent_stop = concurrent_stop
 
     def add(self, name: str, comp: Component,
             stop_after: list = None):
@@ -89,6 +92,10 @@ class Application(object):
                       tracer_default_debug: bool = False,
                       metrics_driver=None, metrics_addr=None,
                       metrics_name=None,
+                      metrics_max_packet_size: int = 1400,
+                      metrics_flush_interval: float = 0,
+                      metrics_reconnect_delay: float = 0.1,
+                      metrics_reconnect_max_delay: float = 30,
                       on_span_finish: Optional[Callable] = None):
         if tracer_driver:
             self.tracer.setup_tracer(tracer_driver, tracer_name, tracer_addr,
@@ -97,7 +104,10 @@ class Application(object):
                                      tracer_default_debug)
         if metrics_driver:
             self.tracer.setup_metrics(metrics_driver, metrics_addr,
-                                      metrics_name)
+                                      metrics_name, metrics_max_packet_size,
+                                      metrics_flush_interval,
+                                      metrics_reconnect_delay,
+                                      metrics_reconnect_max_delay)
         self.tracer.on_span_finish = on_span_finish
 
     async def _shutdown_tracer(self):
@@ -127,13 +137,11 @@ class Application(object):
         self.log_info('Prepare for start')
 
         await asyncio.gather(*[comp.prepare()
-                               for comp in self._components.values()],
-                             loop=self.loop)
+                               for comp in self._components.values()])
 
         self.log_info('Starting...')
         await asyncio.gather(*[comp.start()
-                               for comp in self._components.values()],
-                             loop=self.loop)
+                               for comp in self._components.values()])
 
         self.log_info('Running...')
 
@@ -159,8 +167,20 @@ class Application(object):
 
     async def run_shutdown(self):
         self.log_info('Shutting down...')
-        for comp_name in self._components:
-            await self._stop_comp(comp_name)
+        if self.concurrent_stop:
+            # independent components are stopped concurrently, a component
+            # waits only for the ones listed in its stop_after
+            names = list(self._components)
+            results = await asyncio.gather(
+                *[self._stop_comp_task(comp_name) for comp_name in names],
+                return_exceptions=True)
+            for comp_name, err in zip(names, results):
+                if isinstance(err, BaseException):
+                    logging.error('Failed to stop component %s', comp_name,
+                                  exc_info=err)
+        else:
+            for comp_name in self._components:
+                await self._stop_comp(comp_name)
         await self._shutdown_tracer()
 
     async def _stop_comp(self, name):
@@ -172,6 +192,20 @@ class Application(object):
         await self._components[name].stop()
         self._stopped.append(name)
 
+    def _stop_comp_task(self, name) -> asyncio.Future:
+        if name not in self._stopping:
+            self._stopping[name] = asyncio.ensure_future(
+                self._stop_comp_concurrent(name), loop=self.loop)
+        return self._stopping[name]
+
+    async def _stop_comp_concurrent(self, name):
+        if name in self._stop_deps and self._stop_deps[name]:
+            # errors of dependencies are logged by run_shutdown
+            await asyncio.gather(*[self._stop_comp_task(dep_name)
+                                   for dep_name in self._stop_deps[name]],
+                                 return_exceptions=True)
+        await self._components[name].stop()
+
     async def health(self, ctx: Optional[Span] = None
                      ) -> Dict[str, Optional[BaseException]]:
         if ctx is None:
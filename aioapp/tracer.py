@@ -1,15 +1,15 @@
-from typing import Optional, Any, Callable, List
+from typing import Optional, Any, Callable, List, Union
 from yarl import URL
 import time
 import re
 import asyncio
+from random import SystemRandom
 import aioapp.app  # noqa
 import aiozipkin as az
 import aiozipkin.tracer as azt
 import aiozipkin.span as azs
 import aiozipkin.helpers as azh
 import aiozipkin.utils as azu
-from .misc import async_call
 
 STATS_CLEAN_NAME_RE = re.compile('[^0-9a-zA-Z_.-]')
 STATS_CLEAN_TAG_RE = re.compile('[^0-9a-zA-Z_=.-]')
@@ -54,6 +54,8 @@ CLIENT_ADDR = 'ca'
 MESSAGE_ADDR = 'ma'
 SERVER_ADDR = 'sa'
 
+_random = SystemRandom()
+
 
 class Span:
     def __init__(self,
@@ -156,7 +158,9 @@ class Span:
         if not self._sent:
             self._sent = True
 
-            if self.tracer is not None and not self._skip:
+            # unsampled spans are never reported by zipkin, so there is no
+            # need to build a noop zipkin span and replay tags into it
+            if self.tracer is not None and not self._skip and self.sampled:
                 if self.tracer.tracer_driver == DRIVER_ZIPKIN:
                     _span = self.get_zipkin_span()
                     if self._start_stamp is not None:
@@ -164,6 +168,8 @@ class Span:
                         for _tag_name, _tag_val in self._tags.items():
                             _span.tag(_tag_name, _tag_val)
                         for _ann, _ann_stamp in self._annotations:
+                            if callable(_ann):
+                                _ann = _ann()
                             _span.annotate(_ann, _ann_stamp / 1000000)
                         if self._kind:
                             _span.kind(self._kind)
@@ -191,7 +197,15 @@ class Span:
         self._tags_metrics[key] = str(value)
         return self
 
-    def annotate(self, value: str, ts: Optional[float] = None) -> 'Span':
+    def annotate(self, value: Union[str, Callable[[], str]],
+                 ts: Optional[float] = None) -> 'Span':
+        """
+        value may be a callable returning the annotation, it is called only
+        when the span is actually reported (e.g. ``lambda: repr(args)``)
+        """
+        if not self.sampled:
+            # annotations are reported to zipkin only
+            return self
         self._annotations.append((value, int((ts or time.time()) * 1000000)))
         return self
 
@@ -327,33 +341,55 @@ class Tracer:
                                   loop=self.loop)
         self.tracer = az.Tracer(transport, sampler, endpoint)
 
-    def setup_metrics(self, driver: str, addr: str, name: str) -> None:
+    def setup_metrics(self, driver: str, addr: str, name: str,
+                      max_packet_size: int = 1400,
+                      flush_interval: float = 0,
+                      reconnect_delay: float = 0.1,
+                      reconnect_max_delay: float = 30) -> None:
         if driver not in ('telegraf-influx', 'statsd-influx'):
             raise UserWarning('Unsupported metrics driver')
         url = URL(addr)
-        self.metrics = InfluxMetrics(self, url, name, driver, self.loop)
+        self.metrics = InfluxMetrics(self, url, name, driver, self.loop,
+                                     max_packet_size=max_packet_size,
+                                     flush_interval=flush_interval,
+                                     reconnect_delay=reconnect_delay,
+                                     reconnect_max_delay=reconnect_max_delay)
 
     async def close(self):
-        if self.tracer:
-            await self.tracer.close()
         if self.metrics:
             await self.metrics.close()
+        if self.tracer:
+            await self.tracer.close()
 
 
 class InfluxMetrics:
 
     def __init__(self, tracer: Tracer, url: URL, name: Optional[str],
-                 format: str, loop: asyncio.AbstractEventLoop) -> None:
+                 format: str, loop: asyncio.AbstractEventLoop,
+                 max_packet_size: int = 1400,
+                 flush_interval: float = 0,
+                 reconnect_delay: float = 0.1,
+                 reconnect_max_delay: float = 30) -> None:
         self.tracer = tracer
         self.name = name
         self.url = url
         self.format = format
         self.loop = loop
+        self.max_packet_size = max_packet_size
+        self.flush_interval = flush_interval
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
         self.transport = None
         self.closing = False
+        self._reconnect_attempt = 0
+        self._buffer: List[bytes] = []
+        self._buffer_size = 0
+        self._flush_handle: Optional[asyncio.Handle] = None
         self._connect()
 
     def _connect(self):
+        if self.closing:
+            return
         if self.url.scheme == 'udp':
             asyncio.ensure_future(self._async_conn(), loop=self.loop)
         else:
@@ -363,7 +399,20 @@ class InfluxMetrics:
         connect = self.loop.create_datagram_endpoint(
             lambda: self,
             remote_addr=(self.url.host, self.url.port))
-        self.transport, self.protocol = await connect
+        try:
+            self.transport, self.protocol = await connect
+        except OSError as err:
+            self.tracer.app.log_err(err)
+            self._reconnect()
+
+    def _reconnect(self):
+        # exponential backoff with full jitter, so that many processes
+        # do not reconnect in lockstep
+        delay = min(self.reconnect_max_delay,
+                    self.reconnect_delay * 2 ** self._reconnect_attempt)
+        if delay < self.reconnect_max_delay:
+            self._reconnect_attempt += 1
+        self.loop.call_later(_random.uniform(0, delay), self._connect)
 
     def _escape_name(self, name):
         name = name.replace('\n', '')
@@ -379,17 +428,14 @@ class InfluxMetrics:
                 name = self._escape_name(span._name)
             if self.name:
                 name = self.name + name
-            tags = []
-            for key, value in span._tags_metrics.items():
-                tag = '%s=%s' % (self._escape_name(key),
-                                 self._escape_name(value))
-                tags.append(tag)
+            if span._tags_metrics:
+                name += ''.join(',%s=%s' % (self._escape_name(key),
+                                            self._escape_name(value))
+                                for key, value
+                                in span._tags_metrics.items())
 
             duration = span._finish_stamp - span._start_stamp
 
-            if tags:
-                name = name + ',' + (','.join(tags))
-            
             if self.format == 'telegraf-influx':
                 line = '%s duration=%s %s\n' % (name,
                                                 duration,
@@ -397,11 +443,35 @@ class InfluxMetrics:
             else:
                 line = '%s:%s|ms\n' % (name,
                                        duration)
-                                       
-            self.transport.sendto(line.encode())
+
+            self._push(line.encode())
+
+    def _push(self, data: bytes):
+        if not self.flush_interval:
+            self.transport.sendto(data)
+            return
+        # lines are packed into as few datagrams as possible, a datagram is
+        # sent when it is full or flush_interval passed since the first line
+        if self._buffer_size + len(data) > self.max_packet_size:
+            self._flush()
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+        if self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.flush_interval,
+                                                      self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._buffer and self.transport:
+            self.transport.sendto(b''.join(self._buffer))
+        self._buffer = []
+        self._buffer_size = 0
 
     def connection_made(self, transport):
         self.transport = transport
+        self._reconnect_attempt = 0
 
     def datagram_received(self, data, addr):
         pass
@@ -413,9 +483,10 @@ class InfluxMetrics:
         self.tracer.app.log_err(exc)
         self.transport = None
         if not self.closing:
-            async_call(self.loop, self._connect)
+            self._reconnect()
 
     async def close(self):
         self.closing = True
+        self._flush()
         if self.transport:
             self.transport.close()
@@ -81,14 +81,16 @@ def metrics_server(loop):
             self.transport = transport
 
         def datagram_received(self, data, addr):
-            d = data.decode().split(' ')
-            n = d[0].split(',')
-            requests.append({
-                'name': n[0],
-                'tags': {t.split('=')[0]: t.split('=')[1] for t in n[1:]},
-                'duration': d[1],
-                'time': d[2]
-            })
+            for line in data.decode().splitlines():
+                d = line.split(' ')
+                n = d[0].split(',')
+                requests.append({
+                    'name': n[0],
+                    'tags': {t.split('=')[0]: t.split('=')[1]
+                             for t in n[1:]},
+                    'duration': d[1],
+                    'time': d[2]
+                })
             logging.info('TELEGRAF received %s from %s', data, addr)
             pass
 
@@ -1,4 +1,5 @@
 import gc
+import logging
 import pytest
 import asyncio
 from aioapp.app import Application, Component
@@ -101,6 +102,45 @@ def test_app_stop_seq():
         gc.collect()
 
 
+def test_app_stop_concurrent(caplog):
+    seq = []
+
+    class Cmp(Component):
+
+        def __init__(self, id, fail=False):
+            super().__init__()
+            self.id = id
+            self.fail = fail
+
+        async def stop(self):
+            seq.append(('start', self.id))
+            await asyncio.sleep(0.01)
+            seq.append(('stop', self.id))
+            if self.fail:
+                raise ValueError('boom')
+
+    loop = asyncio.new_event_loop()
+    try:
+        app = Application(loop=loop, concurrent_stop=True)
+        app.add('test1', Cmp(1, fail=True))
+        app.add('test2', Cmp(2))
+        app.add('test3', Cmp(3), stop_after=['test1', 'test2'])
+        loop.run_until_complete(app.run_shutdown())
+
+        assert seq[:2] == [('start', 1), ('start', 2)]
+        assert seq[-2:] == [('start', 3), ('stop', 3)]
+
+        errors = [r for r in caplog.records if r.levelno == logging.ERROR]
+        assert len(errors) == 1
+        assert errors[0].getMessage() == 'Failed to stop component test1'
+        assert isinstance(errors[0].exc_info[1], ValueError)
+        assert 'boom' in caplog.text
+        assert 'Traceback' in caplog.text
+    finally:
+        loop.close()
+        gc.collect()
+
+
 async def test_abc_component():
     cmp = Component()
     with pytest.raises(NotImplementedError):
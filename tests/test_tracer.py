@@ -1,6 +1,9 @@
+import gc
+import asyncio
+from yarl import URL
 import aioapp.app
 import aiozipkin.helpers as azh
-from aioapp.tracer import SERVER, CLIENT
+from aioapp.tracer import SERVER, CLIENT, Tracer, InfluxMetrics
 
 
 async def test_tracer(app: aioapp.app.Application, tracer_server,
@@ -13,6 +16,7 @@ async def test_tracer(app: aioapp.app.Application, tracer_server,
         span.tag('key1', '1', metrics=True)
         span.tag('key2', '2')
         span.metrics_tag('key3', '3')
+        span.annotate(lambda: 'lazy')
         with span.new_child('test_child', CLIENT):
             pass
         with span.new_child('test_skipped', CLIENT) as span_skipped:
@@ -43,6 +47,7 @@ async def test_tracer(app: aioapp.app.Application, tracer_server,
 
             if span['name'] == 'test':
                 assert span['tags'] == {'key1': '1', 'key2': '2'}
+                assert [a['value'] for a in span['annotations']] == ['lazy']
 
         assert 'test' in names
         assert 'test_child' in names
@@ -90,3 +95,113 @@ async def test_tracer_from_hdrs(request, app: aioapp.app.Application,
         assert req[0][0]['parentId'] == '5c639fc540090ee6'
     else:
         assert len(req) == 0
+
+
+def test_metrics_batching():
+    sent = []
+
+    class Transport:
+        def sendto(self, data):
+            sent.append(data)
+
+        def close(self):
+            pass
+
+    class Metrics(InfluxMetrics):
+        def _connect(self):
+            self.transport = Transport()
+
+    loop = asyncio.new_event_loop()
+    try:
+        metrics = Metrics(Tracer(None, loop), URL('udp://127.0.0.1:8125'),
+                          None, 'statsd-influx', loop, max_packet_size=10,
+                          flush_interval=0.1)
+        metrics._push(b'aaaa\n')
+        metrics._push(b'bbbb\n')
+        assert sent == []
+        metrics._push(b'cc\n')
+        assert sent == [b'aaaa\nbbbb\n']
+        loop.run_until_complete(metrics.close())
+        assert sent == [b'aaaa\nbbbb\n', b'cc\n']
+
+        metrics = Metrics(Tracer(None, loop), URL('udp://127.0.0.1:8125'),
+                          None, 'statsd-influx', loop)
+        metrics._push(b'dd\n')
+        assert sent[-1] == b'dd\n'
+    finally:
+        loop.close()
+        gc.collect()
+
+
+def test_unsampled_span_annotations():
+    loop = asyncio.new_event_loop()
+    try:
+        tracer = Tracer(None, loop)
+
+        def fail():
+            raise AssertionError()
+
+        with tracer.new_trace(sampled=False) as span:
+            span.annotate('skipped')
+            span.annotate(fail)
+            with span.new_child('child') as child:
+                child.annotate('skipped')
+        assert span._annotations == []
+        assert child._annotations == []
+        with tracer.new_trace(sampled=True) as span:
+            span.annotate('kept')
+        assert [a for a, _ in span._annotations] == ['kept']
+    finally:
+        loop.close()
+        gc.collect()
+
+
+def test_metrics_reconnect():
+    connects = []
+
+    class Metrics(InfluxMetrics):
+        def _connect(self):
+            connects.append(True)
+
+    loop = asyncio.new_event_loop()
+    try:
+        app = aioapp.app.Application(loop=loop)
+        metrics = Metrics(app.tracer, URL('udp://127.0.0.1:8125'),
+                          None, 'statsd-influx', loop,
+                          reconnect_delay=0.01, reconnect_max_delay=0.04)
+        for _ in range(4):
+            metrics.connection_lost(None)
+        assert metrics._reconnect_attempt == 2
+        loop.run_until_complete(asyncio.sleep(0.05))
+        assert len(connects) == 5
+        metrics.connection_made(None)
+        assert metrics._reconnect_attempt == 0
+        loop.run_until_complete(metrics.close())
+        metrics.connection_lost(None)
+        loop.run_until_complete(asyncio.sleep(0.05))
+        assert len(connects) == 5
+    finally:
+        loop.close()
+        gc.collect()
+
+
+def test_setup_metrics_options():
+    loop = asyncio.new_event_loop()
+    try:
+        app = aioapp.app.Application(loop=loop)
+        app.setup_logging(metrics_driver='statsd-influx',
+                          metrics_addr='udp://127.0.0.1:8125',
+                          metrics_max_packet_size=512,
+                          metrics_flush_interval=0.5,
+                          metrics_reconnect_delay=1,
+                          metrics_reconnect_max_delay=5)
+        metrics = app.tracer.metrics
+        assert metrics.max_packet_size == 512
+        assert metrics.flush_interval == 0.5
+        assert metrics.reconnect_delay == 1
+        assert metrics.reconnect_max_delay == 5
+        loop.run_until_complete(asyncio.sleep(0.01))
+        loop.run_until_complete(app.tracer.close())
+    finally:
+        loop.close()
+        gc.collect()